@@ -20,12 +20,20 @@ Extending keywords:  Either edit the `PHRASE_CONFIG` / `TOKEN_CONFIG` below or
 pass a JSON file (`--kw my_keywords.json`) with the same structure.
 """
 from __future__ import annotations
+import bisect
 import json
 import pathlib
-import re
 import sys
-from collections import Counter
-from typing import Dict, List, Tuple
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import ahocorasick  # C automaton, preferred when installed
+except ImportError:
+    ahocorasick = None
 
 # ---------------------------------------------------------------------------
 # 1. KEYWORD LISTS  – weights are tuned (‑ve for harmful content, +ve protective)
@@ -142,43 +150,253 @@ TOKEN_CONFIG: Dict[str, Dict[str, float]] = {
 # Thresholds – tweak to make classifier stricter or looser
 THRESHOLDS = {"positive": 1.0, "negative": -1.0}
 
+# Weights are stored as integer multiples of 1/WEIGHT_SCALE and summed as ints,
+# so scores are exact and never drift (e.g. -2.0 + 1.7 is -0.3, not -0.30000000000000004)
+WEIGHT_SCALE = 100
+
 # ---------------------------------------------------------------------------
 # 2. HELPERS
 # ---------------------------------------------------------------------------
 
 def normalise(text: str) -> str:
     """Lower‑case the text and collapse whitespace."""
-    return re.sub(r"\s+", " ", text.lower()).strip()
-
-
-def phrase_score(text: str) -> Tuple[float, Counter]:
-    """Score multi‑word phrases first (no overlapping counts)."""
-    score = 0.0
-    counts: Counter = Counter()
-    remaining = text
-    for phrase, weight in PHRASE_CONFIG.items():
-        if phrase in remaining:
-            occurrences = len(re.findall(re.escape(phrase), remaining))
-            counts[phrase] = occurrences
-            score += weight * occurrences
-            # Remove matched phrases to avoid double‑scoring their tokens
-            remaining = remaining.replace(phrase, " ")
-    return score, counts, remaining
-
-
-def token_score(text: str) -> Tuple[float, Counter]:
-    """Score single‑word tokens after phrase removal."""
-    tokens = re.findall(r"[a-zA-Z']+", text)
-    score = 0.0
-    counts: Counter = Counter()
-    for tok in tokens:
-        for cat, words in TOKEN_CONFIG.items():
-            if tok in words:
-                weight = words[tok]
-                counts[tok] += 1
-                score += weight
-                break
-    return score, counts
+    text = text.lower()
+    # Fast path for the common single‑line comment: space is the only printable
+    # whitespace character, so there is nothing to collapse unless it repeats
+    # or sits at either end
+    if text.isprintable() and "  " not in text and text[:1] != " " and text[-1:] != " ":
+        return text
+    return " ".join(text.split())
+
+
+def _flatten_tokens(token_config: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Merge the token categories into a single word → weight table."""
+    weights: Dict[str, float] = {}
+    # Earlier categories win on duplicates, as in the original per-category scan
+    for words in reversed(list(token_config.values())):
+        weights.update(words)
+    return weights
+
+
+def _compile_tables(
+    phrase_config: Dict[str, float], token_config: Dict[str, Dict[str, float]]
+) -> Tuple[List[str], List[int], array, int, bytes]:
+    """Materialise the keyword config as parallel arrays indexed by pattern id.
+
+    Phrases take ids `0 .. N_PHRASES-1` and tokens the rest, each group sorted
+    longest first.  Weights are quantised to `WEIGHT_SCALE` units.
+    `PHRASE_CONFIG` / `TOKEN_CONFIG` stay the authoring API; every scan path
+    reads these arrays.  Nothing global is touched here: `_rebuild` publishes
+    the result only once every artifact has been built.  Quantising also
+    validates every weight, raising `TypeError` for non‑numbers.
+    """
+    phrases = sorted(phrase_config.items(), key=lambda kv: len(kv[0]), reverse=True)
+    tokens = sorted(
+        _flatten_tokens(token_config).items(), key=lambda kv: len(kv[0]), reverse=True
+    )
+    entries = phrases + tokens
+    keys = [key for key, _ in entries]
+    # Plain ints rather than a fixed-width array, so any configured weight fits
+    weights = [round(weight * WEIGHT_SCALE) for _, weight in entries]
+    lens = array("i", (len(key) for key in keys))
+    # Every byte that cannot start a keyword; see `_may_match`
+    initial = {v.encode()[0] for key in keys for v in _quote_variants(key) if v}
+    non_initial = bytes(b for b in range(256) if b not in initial)
+    return keys, weights, lens, len(phrases), non_initial
+
+
+class _TrieAutomaton:
+    """Pure‑Python Aho‑Corasick fallback used when pyahocorasick is missing.
+
+    Mirrors the subset of `ahocorasick.Automaton` used here.  The trie is packed
+    into a flat int32 `GOTO` table of `states × alphabet` (column 0 is "any
+    other character"), with failure links already folded in, so matching is
+    one table lookup per character regardless of how many keywords exist.
+    Entries hold the target state's row offset, and states with output are
+    numbered last, so the scan loop needs no multiply and a single comparison
+    to know whether anything matched.
+    """
+
+    def __init__(self) -> None:
+        self._words: Dict[str, object] = {}
+
+    def add_word(self, key: str, value: object) -> None:
+        self._words[key] = value
+
+    def make_automaton(self) -> None:
+        alphabet = sorted({ch for key in self._words for ch in key})
+        self.columns = {ch: col for col, ch in enumerate(alphabet, 1)}
+        width = len(alphabet) + 1
+
+        # Plain trie first: children[state] maps column -> state
+        children: List[Dict[int, int]] = [{}]
+        accept: List[List[Tuple[int, object]]] = [[]]
+        for key, value in self._words.items():
+            if not key:
+                continue
+            state = 0
+            for ch in key:
+                col = self.columns[ch]
+                nxt = children[state].get(col)
+                if nxt is None:
+                    nxt = len(children)
+                    children[state][col] = nxt
+                    children.append({})
+                    accept.append([])
+                state = nxt
+            accept[state].append((len(key), value))
+
+        # Breadth‑first: resolve FAIL links and complete GOTO into a DFA
+        goto = array("i", bytes(4 * width * len(children)))
+        fail = array("i", bytes(4 * len(children)))
+        out: List[List[Tuple[int, object]]] = [[] for _ in children]
+        queue = []
+        for col, nxt in children[0].items():
+            goto[col] = nxt
+            queue.append(nxt)
+        for state in queue:
+            out[state] = accept[state] + out[fail[state]]
+            row, fail_row = state * width, fail[state] * width
+            for col in range(width):
+                nxt = children[state].get(col)
+                if nxt is None:
+                    goto[row + col] = goto[fail_row + col]
+                else:
+                    goto[row + col] = nxt
+                    fail[nxt] = goto[fail_row + col]
+                    queue.append(nxt)
+
+        # Renumber with accepting states last (the root has no output, so it
+        # stays state 0) and store row offsets instead of state numbers
+        order = sorted(range(len(children)), key=lambda st: bool(out[st]))
+        rank = [0] * len(order)
+        for new, old in enumerate(order):
+            rank[old] = new
+        table = array("i", bytes(4 * width * len(order)))
+        for new, old in enumerate(order):
+            src, dst = old * width, new * width
+            for col in range(width):
+                table[dst + col] = rank[goto[src + col]] * width
+        self.goto = table
+        self.first_output = sum(1 for st in order if not out[st]) * width
+        self.out = {
+            rank[st] * width: [value for _, value in outputs]
+            for st, outputs in enumerate(out)
+            if outputs
+        }
+
+    def iter(self, text: str) -> Iterator[Tuple[int, object]]:
+        """Yield `(end_index, value)` for every occurrence, overlaps included."""
+        goto, out, first_output = self.goto, self.out, self.first_output
+        state = 0
+        for i, col in enumerate(map(self.columns.get, text, repeat(0))):
+            state = goto[state + col]
+            if state >= first_output:
+                for value in out[state]:
+                    yield i, value
+
+
+def _quote_variants(key: str) -> set[str]:
+    """Lower‑cased spellings of `key` with curly and straight apostrophes.
+
+    Matching both forms is decided here, once per keyword, so comments never
+    need their quotes folded at query time.
+    """
+    key = key.lower()
+    return {key, key.replace("’", "'"), key.replace("'", "’")}
+
+
+def _build_automaton(keys: List[str]) -> ahocorasick.Automaton | _TrieAutomaton:
+    """Compile every pattern in the tables into one Aho‑Corasick automaton.
+
+    Each word (in every quote variant) maps to its pattern id.  Phrases are
+    added last so they win if the same string is configured as both a phrase
+    and a token.
+    """
+    automaton = ahocorasick.Automaton() if ahocorasick else _TrieAutomaton()
+    for pid in reversed(range(len(keys))):
+        for variant in _quote_variants(keys[pid]):
+            automaton.add_word(variant, pid)
+    automaton.make_automaton()
+    return automaton
+
+
+# Characters that extend a word; a token hit touching one of them is a substring
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'")
+
+
+def _iter_hits(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield `(end_index, pattern id)` for every keyword hit in `text`.
+
+    Phrases are chosen first, leftmost‑longest and non‑overlapping, and consume
+    the characters they cover.  Tokens then count only as whole words outside
+    those phrases; a consumed phrase acts as a word boundary, just as the old
+    remainder had the phrase replaced by a space.
+    """
+    # The per-character walk runs inside the automaton; bind what the per-hit
+    # Python below touches to locals so it stays off the globals dict
+    n_phrases, lens, word_chars = N_PHRASES, PATTERN_LENS, _WORD_CHARS
+    n = len(text)
+    # All occurrences, overlaps included; the leftmost‑longest choice is made
+    # here rather than by `iter_long`, which drops a short match at the end of
+    # the text while a longer keyword is still partly matched
+    phrases = []
+    tokens = []
+    for end_idx, pid in AUTOMATON.iter(text):
+        length = lens[pid]
+        hit = (end_idx + 1 - length, -length, pid)
+        (tokens if pid >= n_phrases else phrases).append(hit)
+
+    consumed = 0
+    mask = None  # 1 for every character inside an accepted phrase
+    if phrases:
+        mask = bytearray(n)
+        phrases.sort()  # (start, -length) never ties for two different keywords
+        for start, neg_len, pid in phrases:
+            if start >= consumed:
+                consumed = start - neg_len
+                mask[start:consumed] = b"\x01" * -neg_len
+                yield consumed - 1, pid
+
+    for start, neg_len, pid in tokens:
+        end = start - neg_len
+        before = start > 0 and text[start - 1] in word_chars
+        after = end < n and text[end] in word_chars
+        if mask is not None:
+            if 1 in mask[start:end]:
+                continue  # Part of an accepted phrase
+            before = before and not mask[start - 1]
+            after = after and not mask[end]
+        if not (before or after):
+            yield end - 1, pid
+
+
+def keyword_score(text: str) -> Tuple[int, int, Dict[int, int]]:
+    """Score phrases and tokens in a single pass over the text.
+
+    Scores are integers in `WEIGHT_SCALE` units.  Hits are tallied by pattern
+    id; `hit_counts` turns them back into keyword `Counter`s when a caller
+    needs them.
+    """
+    n_phrases, weights = N_PHRASES, PATTERN_WEIGHTS
+    p_score = t_score = 0
+    hits: Dict[int, int] = {}
+    for _, pid in _iter_hits(text):
+        if pid >= n_phrases:
+            t_score += weights[pid]
+        else:
+            p_score += weights[pid]
+        hits[pid] = hits.get(pid, 0) + 1
+    return p_score, t_score, hits
+
+
+def hit_counts(hits: Iterable[Tuple[int, int]]) -> Tuple[Counter, Counter]:
+    """Split `(pattern id, count)` pairs into phrase and token `Counter`s."""
+    p_counts: Counter = Counter()
+    t_counts: Counter = Counter()
+    for pid, count in hits:
+        (t_counts if pid >= N_PHRASES else p_counts)[PATTERN_KEYS[pid]] = count
+    return p_counts, t_counts
 
 
 def classify(total: float) -> str:
@@ -192,16 +410,97 @@ def classify(total: float) -> str:
 # 3. PUBLIC API
 # ---------------------------------------------------------------------------
 
-def analyze_sentiment(text: str, *, debug: bool = False) -> Dict[str, object]:
-    text_norm = normalise(text)
-    p_score, p_counts, remainder = phrase_score(text_norm)
-    t_score, t_counts = token_score(remainder)
-    total = p_score + t_score
-    sentiment = classify(total)
-    if debug:
-        print("DEBUG phrase counts:", p_counts)
-        print("DEBUG token counts:", t_counts)
-        print("DEBUG total score:", total)
+def _may_match(text: str) -> bool:
+    """Cheap pre‑filter: can any keyword start somewhere in `text`?
+
+    Deleting every byte that no keyword starts with happens in one C call; if
+    nothing survives (emoji, numbers, other scripts…) the scan is skipped.
+    """
+    return bool(text.encode("utf-8", "surrogatepass").translate(None, _NON_INITIAL_BYTES))
+
+
+ScoreEntry = Tuple[str, float, Tuple[Tuple[int, int], ...]]
+
+# LRU cache of normalised text → score entry, shared by `analyze_sentiment` and
+# `analyze_batch`.  An OrderedDict rather than `functools.lru_cache` because
+# the batch path must look entries up and store them without scanning; the
+# lock makes it safe for the monitor's worker threads.
+SCORE_CACHE_SIZE = 65536
+_score_cache: OrderedDict[str, ScoreEntry] = OrderedDict()
+_score_cache_lock = threading.Lock()
+
+
+def _cache_get(text_norm: str) -> ScoreEntry | None:
+    with _score_cache_lock:
+        entry = _score_cache.get(text_norm)
+        if entry is not None:
+            _score_cache.move_to_end(text_norm)
+        return entry
+
+
+def _cache_put(text_norm: str, entry: ScoreEntry) -> None:
+    with _score_cache_lock:
+        _score_cache[text_norm] = entry
+        _score_cache.move_to_end(text_norm)
+        if len(_score_cache) > SCORE_CACHE_SIZE:
+            _score_cache.popitem(last=False)
+
+
+def _entry(score: int, hits: Dict[int, int]) -> ScoreEntry:
+    """Immutable result for a scaled score and its per‑pattern hit tallies."""
+    total = score / WEIGHT_SCALE
+    return classify(total), total, tuple(sorted(hits.items())) if hits else ()
+
+
+def _score_cached(text_norm: str) -> ScoreEntry:
+    """Score normalised text; results are immutable so repeats are free."""
+    entry = _cache_get(text_norm)
+    if entry is None:
+        if not _may_match(text_norm):
+            return classify(0.0), 0.0, ()
+        p_score, t_score, hits = keyword_score(text_norm)
+        entry = _entry(p_score + t_score, hits)
+        _cache_put(text_norm, entry)
+    return entry
+
+
+def _rebuild(
+    phrase_config: Dict[str, float] | None = None,
+    token_config: Dict[str, Dict[str, float]] | None = None,
+) -> None:
+    """Recompile every matcher artifact for a keyword config.
+
+    Defaults to the current `PHRASE_CONFIG` / `TOKEN_CONFIG`; `load_custom_keywords`
+    passes merged copies instead, so a config that fails to build is never
+    adopted.  Runs at import and after `load_custom_keywords`, never on the
+    scoring path, so `analyze_sentiment` can assume the artifacts are fresh.
+    """
+    global PATTERN_KEYS, PATTERN_WEIGHTS, PATTERN_LENS, N_PHRASES, _NON_INITIAL_BYTES
+    global AUTOMATON, KEYWORDS_VERSION
+    keys, weights, lens, n_phrases, non_initial = _compile_tables(
+        PHRASE_CONFIG if phrase_config is None else phrase_config,
+        TOKEN_CONFIG if token_config is None else token_config,
+    )
+    automaton = _build_automaton(keys)
+    # Swap everything in together so a failed build leaves the old set intact
+    PATTERN_KEYS, PATTERN_WEIGHTS, PATTERN_LENS = keys, weights, lens
+    N_PHRASES, _NON_INITIAL_BYTES, AUTOMATON = n_phrases, non_initial, automaton
+    with _score_cache_lock:
+        _score_cache.clear()
+    KEYWORDS_VERSION += 1
+
+
+KEYWORDS_VERSION = 0  # Bumped on every rebuild
+_rebuild()
+
+
+def get_matcher() -> ahocorasick.Automaton | _TrieAutomaton:
+    """Return the automaton compiled for the current keyword set."""
+    return AUTOMATON
+
+
+def _result(sentiment: str, total: float, hits: Iterable[Tuple[int, int]]) -> Dict[str, object]:
+    p_counts, t_counts = hit_counts(hits)
     return {
         "sentiment": sentiment,
         "score": total,
@@ -209,6 +508,65 @@ def analyze_sentiment(text: str, *, debug: bool = False) -> Dict[str, object]:
         "token_hits": t_counts,
     }
 
+
+def analyze_sentiment(text: str, *, debug: bool = False) -> Dict[str, object]:
+    sentiment, total, hits = _score_cached(normalise(text))
+    result = _result(sentiment, total, hits)
+    if debug:
+        print("DEBUG phrase counts:", result["phrase_hits"])
+        print("DEBUG token counts:", result["token_hits"])
+        print("DEBUG total score:", total)
+    return result
+
+
+# Joins batched texts; not part of any keyword and not a word character
+BATCH_SEPARATOR = "\x00"
+
+
+def analyze_batch(texts: Iterable[str]) -> List[Dict[str, object]]:
+    """Analyse many texts, scanning the uncached ones in a single automaton pass.
+
+    Texts already in the score cache, or rejected by `_may_match`, are served
+    directly, and identical texts are scored once.  The rest are joined with
+    `BATCH_SEPARATOR` and scanned together; each hit is attributed back to its
+    text by offset (no keyword contains the separator, so no hit can span two
+    texts) and the new results are cached.  Results match `analyze_sentiment`
+    for every text, wherever it sits in the batch.
+    """
+    norms = [normalise(text) for text in texts]
+    entries: Dict[str, ScoreEntry | None] = {}
+    pending: List[str] = []
+    for norm in norms:
+        if norm in entries:
+            continue
+        entry = _cache_get(norm)
+        if entry is None and not _may_match(norm):
+            entry = (classify(0.0), 0.0, ())
+        if entry is None:
+            pending.append(norm)
+        entries[norm] = entry
+
+    if pending:
+        starts: List[int] = []
+        pos = 0
+        for norm in pending:
+            starts.append(pos)
+            pos += len(norm) + 1
+        scores = [0] * len(pending)
+        # Tallies are only created for texts that actually contain a keyword
+        hits: Dict[int, Dict[int, int]] = {}
+        for end_idx, pid in _iter_hits(BATCH_SEPARATOR.join(pending)):
+            idx = bisect.bisect_right(starts, end_idx) - 1
+            scores[idx] += PATTERN_WEIGHTS[pid]
+            text_hits = hits.setdefault(idx, {})
+            text_hits[pid] = text_hits.get(pid, 0) + 1
+        for idx, norm in enumerate(pending):
+            entry = _entry(scores[idx], hits.get(idx, {}))
+            entries[norm] = entry
+            _cache_put(norm, entry)
+
+    return [_result(*entries[norm]) for norm in norms]
+
 # ---------------------------------------------------------------------------
 # 4. CLI ENTRY
 # ---------------------------------------------------------------------------
@@ -219,10 +577,19 @@ def load_custom_keywords(path: str | pathlib.Path) -> None:
     if not p.exists():
         raise FileNotFoundError(p)
     data = json.loads(p.read_text())
-    PHRASE_CONFIG.update(data.get("phrases", {}))
+    # Merge into copies; the live config only changes once the merged set
+    # has been validated and compiled
+    phrases = {**PHRASE_CONFIG, **data.get("phrases", {})}
+    tokens = {cat: dict(words) for cat, words in TOKEN_CONFIG.items()}
     for cat, words in data.get("tokens", {}).items():
-        if cat not in TOKEN_CONFIG:
+        if cat not in tokens:
             raise ValueError(f"Unknown token category {cat}")
+        tokens[cat].update(words)
+    _rebuild(phrases, tokens)
+    PHRASE_CONFIG.clear()
+    PHRASE_CONFIG.update(phrases)
+    for cat, words in tokens.items():
+        TOKEN_CONFIG[cat].clear()
         TOKEN_CONFIG[cat].update(words)
 
 
@@ -239,9 +606,9 @@ def main(argv: List[str] | None = None) -> None:
 
     # ---------------- CLI ARGUMENT MODE ----------------------
     if "-h" in argv or "--help" in argv:
-        print("Usage:
-  python keyword_sentiment_analysis.py \"text to analyse\" [--debug] [--kw file.json]
-  python keyword_sentiment_analysis.py            # then type message when prompted")
+        print("Usage:\n"
+              "  python keyword_sentiment_analysis.py \"text to analyse\" [--debug] [--kw file.json]\n"
+              "  python keyword_sentiment_analysis.py            # then type message when prompted")
         sys.exit(0)
 
     debug = False
@@ -261,5 +628,4 @@ def main(argv: List[str] | None = None) -> None:
 
 
 if __name__ == "__main__":
-    main() "__main__":
     main()
@@ -8,8 +8,13 @@ Usage:
     python reddit_monitor.py
 """
 
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import praw
-from analysis import analyze_sentiment  # Sentiment engine from analysis.py
+from analysis import analyze_batch, analyze_sentiment  # Sentiment engine from analysis.py
 
 # Reddit API credentials (replace with your own)
 REDDIT_CLIENT_ID = "YOUR_CLIENT_ID"
@@ -20,6 +25,13 @@ REDDIT_USER_AGENT = "ChildPredatorDetectionBot/0.1 by YOUR_USERNAME"
 SUBREDDITS_TO_MONITOR = "teenagers+AskTeenGirls+AskTeenBoys"
 SENTIMENT_TO_FLAG = "negative"
 
+# Scoring runs on a small thread pool fed by the stream through a bounded queue
+NUM_WORKERS = 4
+QUEUE_SIZE = 1024
+BATCH_SIZE = 32  # Comments scanned per automaton pass
+BATCH_TIMEOUT = 0.5  # Seconds a partial batch may wait before it is flushed
+_STOP = object()  # Sentinel telling workers / printer to exit
+
 reddit = praw.Reddit(
     client_id=REDDIT_CLIENT_ID,
     client_secret=REDDIT_CLIENT_SECRET,
@@ -28,26 +40,98 @@ reddit = praw.Reddit(
 
 subreddit = reddit.subreddit(SUBREDDITS_TO_MONITOR)
 
+def score_batch(batch, flagged):
+    """Analyse a batch and forward flagged comments; errors go to the printer too.
+
+    If the batched scan fails, every comment is retried on its own so a single
+    bad comment is the only one skipped.
+    """
+    try:
+        results = analyze_batch([c.body for c in batch])
+    except Exception as e:
+        flagged.put(f"❌ Error: {e} (retrying batch comment by comment)")
+        results = []
+        for c in batch:
+            try:
+                results.append(analyze_sentiment(c.body))
+            except Exception as e:
+                flagged.put(f"❌ Error: {e}")
+                results.append(None)
+    for c, result in zip(batch, results):
+        if result is not None and result["sentiment"] == SENTIMENT_TO_FLAG:
+            flagged.put((c, result))
+
+
+def score_worker(comments, flagged):
+    """Pull comments off the queue in batches and forward anything flagged.
+
+    A batch is scanned as soon as it holds BATCH_SIZE comments, or once its
+    oldest comment has waited BATCH_TIMEOUT seconds, so latency stays bounded.
+    """
+    batch = []
+    deadline = 0.0
+    while True:
+        timeout = max(0.0, deadline - time.monotonic()) if batch else None
+        try:
+            comment = comments.get(timeout=timeout)
+        except queue.Empty:
+            comment = None
+        if comment is not None and comment is not _STOP:
+            if not batch:
+                deadline = time.monotonic() + BATCH_TIMEOUT
+            batch.append(comment)
+            if len(batch) < BATCH_SIZE:
+                continue
+        if batch:
+            score_batch(batch, flagged)
+            batch = []
+        if comment is _STOP:
+            break
+
+
+def print_flagged(flagged):
+    """Single printer thread so reports from different workers never interleave."""
+    while True:
+        item = flagged.get()
+        if item is _STOP:
+            break
+        if isinstance(item, str):
+            print(item)  # Error reported by a worker
+            continue
+        comment, result = item
+        print("⚠️  Suspicious Comment Detected")
+        print(f"👤 Author: u/{comment.author}")
+        print(f"💬 Comment: {comment.body}")
+        print(f"📊 Analysis: {result}")
+        print(f"🔗 Link: https://reddit.com{comment.permalink}")
+        print("-" * 80)
+
+
 def monitor_comments():
     print(f"🚨 Monitoring comments in r/{SUBREDDITS_TO_MONITOR}...\n")
+    comments = queue.Queue(maxsize=QUEUE_SIZE)
+    flagged = queue.Queue()
+    printer = threading.Thread(target=print_flagged, args=(flagged,), daemon=True)
+    printer.start()
+    pool = ThreadPoolExecutor(max_workers=NUM_WORKERS)
+    for _ in range(NUM_WORKERS):
+        pool.submit(score_worker, comments, flagged)
     try:
+        # The stream thread only does network I/O; scoring happens in the pool
         for comment in subreddit.stream.comments(skip_existing=True):
             if comment.author is None:
                 continue  # Skip deleted users
-
-            result = analyze_sentiment(comment.body)
-
-            if result["sentiment"] == SENTIMENT_TO_FLAG:
-                print("⚠️  Suspicious Comment Detected")
-                print(f"👤 Author: u/{comment.author}")
-                print(f"💬 Comment: {comment.body}")
-                print(f"📊 Analysis: {result}")
-                print(f"🔗 Link: https://reddit.com{comment.permalink}")
-                print("-" * 80)
+            comments.put(comment)
     except KeyboardInterrupt:
         print("\n🛑 Monitoring stopped by user.")
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        for _ in range(NUM_WORKERS):
+            comments.put(_STOP)
+        pool.shutdown(wait=True)
+        flagged.put(_STOP)
+        printer.join()
 
 if __name__ == "__main__":
     monitor_comments()
@@ -0,0 +1,147 @@
+import copy
+import json
+import random
+
+import pytest
+
+import analysis
+
+
+@pytest.fixture
+def custom_keywords(tmp_path):
+    """Load a keyword file for one test, restoring the built-in config after."""
+    phrases = dict(analysis.PHRASE_CONFIG)
+    tokens = copy.deepcopy(analysis.TOKEN_CONFIG)
+
+    def load(data):
+        path = tmp_path / "keywords.json"
+        path.write_text(json.dumps(data))
+        analysis.load_custom_keywords(path)
+
+    yield load
+    analysis.PHRASE_CONFIG.clear()
+    analysis.PHRASE_CONFIG.update(phrases)
+    analysis.TOKEN_CONFIG.clear()
+    analysis.TOKEN_CONFIG.update(tokens)
+    analysis._rebuild()
+
+
+@pytest.mark.parametrize("text", ["You’re so mature", "You're so mature"])
+def test_token_at_end_inside_unfinished_phrase(text):
+    result = analysis.analyze_sentiment(text)
+    assert result["sentiment"] == "negative"
+    assert result["score"] == -1.0
+    assert result["token_hits"] == {"mature": 1}
+
+
+@pytest.mark.parametrize("text", ["i love you", "i love you!"])
+def test_phrase_at_end_inside_unfinished_custom_phrase(custom_keywords, text):
+    custom_keywords({"phrases": {"i love you so much": -2.0}})
+    result = analysis.analyze_sentiment(text)
+    assert result["score"] == -1.2
+    assert result["phrase_hits"] == {"love you": 1}
+
+
+def test_phrase_edge_is_a_token_boundary():
+    # The old remainder replaced "want to see something cool" by a space
+    result = analysis.analyze_sentiment("bullywant to see something cool")
+    assert result["score"] == -2.8
+    assert result["token_hits"] == {"bully": 1}
+
+
+def test_tokens_inside_a_phrase_are_not_scored():
+    result = analysis.analyze_sentiment("You’re so mature for your age")
+    assert result["phrase_hits"] == {"you’re so mature for your age": 1}
+    assert result["token_hits"] == {}
+
+
+@pytest.mark.parametrize("text", ["You're so mature for your age", "you’re so mature for your age"])
+def test_straight_and_curly_apostrophes_match_the_same_phrase(text):
+    result = analysis.analyze_sentiment(text)
+    assert result["phrase_hits"] == {"you’re so mature for your age": 1}
+
+
+@pytest.mark.parametrize("text", ["teen’s", "predator’s profile"])
+def test_curly_apostrophe_splits_tokens(text):
+    # As in the original [a-zA-Z']+ tokenizer, which did not include U+2019
+    assert analysis.analyze_sentiment(text)["sentiment"] == "negative"
+
+
+def _fallback_automaton():
+    automaton = analysis._TrieAutomaton()
+    for pid in reversed(range(len(analysis.PATTERN_KEYS))):
+        for variant in analysis._quote_variants(analysis.PATTERN_KEYS[pid]):
+            automaton.add_word(variant, pid)
+    automaton.make_automaton()
+    return automaton
+
+
+def _keyword_heavy_texts(count, seed=0):
+    rng = random.Random(seed)
+    words = analysis.PATTERN_KEYS + ["the", "you", "so", "x", "’", "'", "-", "!"]
+    return [
+        "".join(
+            rng.choice([w, w[:2], w[1:], w[:-1]]) + rng.choice(["", " ", "."])
+            for w in rng.choices(words, k=rng.randint(0, 12))
+        )
+        for _ in range(count)
+    ]
+
+
+def test_fallback_automaton_agrees_with_pyahocorasick(monkeypatch):
+    pytest.importorskip("ahocorasick")
+    texts = [analysis.normalise(t) for t in _keyword_heavy_texts(3000)]
+    native = [sorted(analysis.AUTOMATON.iter(t)) for t in texts]
+    scores = [analysis.keyword_score(t) for t in texts]
+    fallback = _fallback_automaton()
+    assert [sorted(fallback.iter(t)) for t in texts] == native
+    monkeypatch.setattr(analysis, "AUTOMATON", fallback)
+    assert [analysis.keyword_score(t) for t in texts] == scores
+
+
+def test_batch_result_does_not_depend_on_position():
+    results = analysis.analyze_batch(["you’re so mature", "hi", "you’re so mature"])
+    assert [r["score"] for r in results] == [-1.0, 0.0, -1.0]
+
+
+def test_batch_matches_single_analysis():
+    texts = _keyword_heavy_texts(2000, seed=1)
+    assert analysis.analyze_batch(texts) == [analysis.analyze_sentiment(t) for t in texts]
+
+
+def test_large_custom_weights_are_accepted(custom_keywords):
+    custom_keywords({"tokens": {"negative": {"creep": -1000.0}}})
+    assert analysis.analyze_sentiment("what a creep")["score"] == -1000.0
+
+
+def test_bad_weight_leaves_config_loadable(custom_keywords):
+    with pytest.raises(TypeError):
+        custom_keywords({"tokens": {"negative": {"creep": "very bad"}}})
+    assert "creep" not in analysis.TOKEN_CONFIG["negative"]
+    assert len(analysis.PATTERN_KEYS) == len(analysis.PATTERN_WEIGHTS)
+    assert analysis.analyze_sentiment("protect")["token_hits"] == {"protect": 1}
+    # A later valid load must not trip over the rejected weight
+    custom_keywords({"tokens": {"negative": {"weirdo": -1.0}}})
+    assert analysis.analyze_sentiment("weirdo")["score"] == -1.0
+
+
+def test_unknown_category_merges_nothing(custom_keywords):
+    with pytest.raises(ValueError):
+        custom_keywords({"phrases": {"meet me irl": -2.0}, "tokens": {"bogus": {"x": 1.0}}})
+    assert "meet me irl" not in analysis.PHRASE_CONFIG
+    assert analysis.analyze_sentiment("meet me irl")["score"] == 0.0
+    custom_keywords({"phrases": {"meet me irl": -2.0}})
+    assert analysis.analyze_sentiment("meet me irl")["score"] == -2.0
+
+
+def test_batch_serves_cached_and_unmatchable_texts_without_scanning(monkeypatch):
+    texts = ["Send me a pic", "send me a pic", "😂😂", "lol"]
+    first = analysis.analyze_batch(texts)
+    assert analysis._cache_get("send me a pic") is not None
+
+    def no_scan(text):
+        raise AssertionError(f"unexpected scan of {text!r}")
+
+    monkeypatch.setattr(analysis, "_iter_hits", no_scan)
+    assert analysis.analyze_batch(texts) == first
+    assert analysis.analyze_sentiment("send me a pic") == first[0]